@@ -1,7 +1,7 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from datetime import datetime
+from .utils import resolve_planning_date
 
 # Common chart style to ensure black text
 def _apply_chart_style(fig):
@@ -97,8 +97,9 @@ def render_procurement_table(procurement_df):
     ), use_container_width=True)
 
 
-def render_scheduling_gantt(gantt_tasks_df):
-    baseline = pd.Timestamp(datetime.today().date())
+def render_scheduling_gantt(gantt_tasks_df, planning_date=None):
+    # task hours are offsets from the planning date the schedule was solved for
+    baseline = resolve_planning_date(planning_date)
     gantt = gantt_tasks_df.copy()
     gantt['Start_dt'] = gantt['Start_Hours'].apply(lambda h: baseline + pd.Timedelta(hours=float(h)))
     gantt['Finish_dt'] = gantt['Finish_Hours'].apply(lambda h: baseline + pd.Timedelta(hours=float(h)))
@@ -117,8 +118,8 @@ def render_scheduling_gantt(gantt_tasks_df):
     st.plotly_chart(fig2, use_container_width=True)
 
 
-def render_scheduling_table(gantt_tasks_df):
-    baseline = pd.Timestamp(datetime.today().date())
+def render_scheduling_table(gantt_tasks_df, planning_date=None):
+    baseline = resolve_planning_date(planning_date)
     gantt = gantt_tasks_df.copy()
     gantt['Start_dt'] = gantt['Start_Hours'].apply(lambda h: baseline + pd.Timedelta(hours=float(h)))
     gantt['Finish_dt'] = gantt['Finish_Hours'].apply(lambda h: baseline + pd.Timedelta(hours=float(h)))
@@ -0,0 +1,248 @@
+# modules/data_model.py
+from dataclasses import dataclass, field, replace
+import numpy as np
+import pandas as pd
+
+@dataclass
+class ProductTable:
+    ids: np.ndarray                 # object, Product_ID
+    due_dates: np.ndarray           # datetime64
+    units: np.ndarray               # float64, Units to Delivered
+    on_hand: np.ndarray             # float64
+    release_days: np.ndarray        # int64, PlannedOrderRelease
+    penalty_per_day: np.ndarray     # float64, 0 when not given
+    days_from_today: np.ndarray     # float64, NaN when not given
+
+@dataclass
+class MachineTable:
+    ids: np.ndarray                 # object, Machine / Vessel ID
+    op_cost_per_hour: np.ndarray    # float64
+    cycle_time_hours: np.ndarray    # float64
+    capacity_units: np.ndarray      # float64
+    pre_maintenance_hours: np.ndarray
+    post_maintenance_hours: np.ndarray
+
+@dataclass(frozen=True)
+class MaterialParams:
+    """Typed lot-sizing inputs for one material, as read by calculate_day_by_day_plan."""
+    ordering_cost: float
+    holding_cost_per_day: float
+    lead_time_days: int
+    safety_stock: float
+    backorder_cost_per_day: float
+    on_hand: float
+    opening_stock: float            # stock on the first simulated day
+    scheduled_receipts: float       # quantity arriving on receipt_date
+    receipt_date: object            # pd.Timestamp or None
+    annual_demand: float            # NaN when not given
+
+    @classmethod
+    def from_details(cls, material_details):
+        """Builds params from a per-material dict, with the .get() defaults the planner always used."""
+        get = material_details.get
+        on_hand = float(get('OnHand', 0))
+        opening_stock = float(get('OnHand', get('ScheduledReceipts', 0)))
+        receipt_date = None
+        if 'PlannedOrderReceiptDate' in material_details and pd.notna(get('PlannedOrderReceiptDate', None)):
+            try:
+                receipt_date = pd.to_datetime(get('PlannedOrderReceiptDate'))
+                opening_stock = on_hand
+            except Exception:
+                receipt_date = None
+        return cls(
+            ordering_cost=float(get('OrderingCost', 0)),
+            holding_cost_per_day=float(get('HoldingCostPerDay', 0)),
+            lead_time_days=int(get('LeadTime', 0)),
+            safety_stock=float(get('SafetyStock', 0)),
+            backorder_cost_per_day=float(get('BackorderCostPerUnitPerDay', get('BackorderCostPerUnit', 0))),
+            on_hand=on_hand,
+            opening_stock=opening_stock,
+            scheduled_receipts=float(get('ScheduledReceipts', 0)),
+            receipt_date=receipt_date,
+            annual_demand=float(get('AnnualDemand', np.nan))
+        )
+
+@dataclass
+class MaterialTable:
+    ids: np.ndarray                 # object, Raw materials
+    ordering_cost: np.ndarray       # float64
+    holding_cost_per_day: np.ndarray
+    lead_time_days: np.ndarray      # int64
+    safety_stock: np.ndarray
+    backorder_cost_per_day: np.ndarray
+    on_hand: np.ndarray
+    opening_stock: np.ndarray       # OnHand, or ScheduledReceipts when there is no OnHand column and no receipt date
+    scheduled_receipts: np.ndarray
+    receipt_dates: np.ndarray       # datetime64, NaT when no planned receipt
+    annual_demand: np.ndarray       # float64, NaN when not given
+
+    def params(self, k):
+        receipt_date = self.receipt_dates[k]
+        return MaterialParams(
+            ordering_cost=float(self.ordering_cost[k]),
+            holding_cost_per_day=float(self.holding_cost_per_day[k]),
+            lead_time_days=int(self.lead_time_days[k]),
+            safety_stock=float(self.safety_stock[k]),
+            backorder_cost_per_day=float(self.backorder_cost_per_day[k]),
+            on_hand=float(self.on_hand[k]),
+            opening_stock=float(self.opening_stock[k]),
+            scheduled_receipts=float(self.scheduled_receipts[k]),
+            receipt_date=None if np.isnat(receipt_date) else pd.Timestamp(receipt_date),
+            annual_demand=float(self.annual_demand[k])
+        )
+
+@dataclass
+class BomTable:
+    parents: np.ndarray             # object, Parent product ID
+    items: np.ndarray               # object, Item (raw material ID)
+    parent_idx: np.ndarray          # int64 index into ProductTable, -1 for unknown parents
+    quantity: np.ndarray            # float64, REQUIREMENTS per unit of parent
+
+@dataclass
+class PlantModel:
+    """
+    Typed, array-backed view of the input workbook built once by load_workbook.
+    eligibility[i, m] is True when product i may run on machine m.
+    """
+    products: ProductTable
+    machines: MachineTable
+    materials: MaterialTable
+    bom: BomTable
+    eligibility: np.ndarray
+    product_index: dict = field(default_factory=dict)
+    machine_index: dict = field(default_factory=dict)
+    material_index: dict = field(default_factory=dict)
+
+def _float_column(df, col, default=0.0):
+    if col not in df.columns:
+        return np.full(len(df), default, dtype=float)
+    return pd.to_numeric(df[col], errors='coerce').fillna(default).to_numpy(dtype=float)
+
+def _id_column(df, col):
+    if col not in df.columns:
+        return np.array([], dtype=object)
+    return df[col].to_numpy(dtype=object)
+
+def build_material_table(materials_df):
+    """
+    Converts the raw material sheet into a MaterialTable.
+    Blank cells take the same defaults as absent columns.
+    """
+    on_hand = _float_column(materials_df, 'OnHand')
+    scheduled_receipts = _float_column(materials_df, 'ScheduledReceipts')
+    if 'PlannedOrderReceiptDate' in materials_df.columns:
+        receipt_dates = pd.to_datetime(materials_df['PlannedOrderReceiptDate'], errors='coerce').to_numpy()
+    else:
+        receipt_dates = np.full(len(materials_df), np.datetime64('NaT'), dtype='datetime64[ns]')
+    opening_stock = on_hand if 'OnHand' in materials_df.columns else scheduled_receipts
+    opening_stock = np.where(np.isnat(receipt_dates), opening_stock, on_hand)
+    if 'BackorderCostPerUnitPerDay' in materials_df.columns:
+        backorder_cost = _float_column(materials_df, 'BackorderCostPerUnitPerDay')
+    else:
+        backorder_cost = _float_column(materials_df, 'BackorderCostPerUnit')
+    if 'AnnualDemand' in materials_df.columns:
+        annual_demand = pd.to_numeric(materials_df['AnnualDemand'], errors='coerce').to_numpy(dtype=float)
+    else:
+        annual_demand = np.full(len(materials_df), np.nan)
+    return MaterialTable(
+        ids=_id_column(materials_df, 'Raw materials'),
+        ordering_cost=_float_column(materials_df, 'OrderingCost'),
+        holding_cost_per_day=_float_column(materials_df, 'HoldingCostPerDay'),
+        lead_time_days=_float_column(materials_df, 'LeadTime').astype(np.int64),
+        safety_stock=_float_column(materials_df, 'SafetyStock'),
+        backorder_cost_per_day=backorder_cost,
+        on_hand=on_hand,
+        opening_stock=opening_stock,
+        scheduled_receipts=scheduled_receipts,
+        receipt_dates=receipt_dates,
+        annual_demand=annual_demand
+    )
+
+def _build_machine_table(machines_df):
+    return MachineTable(
+        ids=_id_column(machines_df, 'Machine / Vessel ID'),
+        op_cost_per_hour=_float_column(machines_df, 'Running Cost Per Hour in Rs'),
+        cycle_time_hours=_float_column(machines_df, 'Cycle Time in Hours Per Batch'),
+        capacity_units=_float_column(machines_df, 'Volume[Capacity] in Units Per batch'),
+        pre_maintenance_hours=_float_column(machines_df, 'PreMaintenanceHours'),
+        post_maintenance_hours=_float_column(machines_df, 'PostMaintenanceHours')
+    )
+
+def _build_eligibility(product_index, machine_index, eligibility_df):
+    # Products/machines absent from the Eligibility sheet are unconstrained;
+    # blank cells count as eligible, as bool(NaN) did before.
+    eligibility = np.ones((len(product_index), len(machine_index)), dtype=bool)
+    if eligibility_df is not None and not eligibility_df.empty and 'Product_ID' in eligibility_df.columns:
+        machine_cols = [c for c in eligibility_df.columns if c in machine_index]
+        rows = np.array([product_index.get(p, -1) for p in eligibility_df['Product_ID']], dtype=np.int64)
+        known = rows >= 0
+        if machine_cols and known.any():
+            flags = eligibility_df.loc[known, machine_cols].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+            allowed = np.isnan(flags) | (flags != 0)
+            cols = np.array([machine_index[c] for c in machine_cols], dtype=np.int64)
+            eligibility[np.ix_(rows[known], cols)] = allowed
+    return eligibility
+
+def build_plant_model(products_df, bom_df, materials_df, machines_df, eligibility_df):
+    """
+    Converts the cleaned sheet DataFrames into a PlantModel.
+    Column defaults mirror what the MRP and scheduling cores assumed for missing values.
+    """
+    product_ids = _id_column(products_df, 'Product_ID')
+    if 'Days from Today' in products_df.columns:
+        days_from_today = pd.to_numeric(products_df['Days from Today'], errors='coerce').to_numpy(dtype=float)
+    else:
+        days_from_today = np.full(len(products_df), np.nan)
+    if 'Due Date' in products_df.columns:
+        due_dates = pd.to_datetime(products_df['Due Date'], errors='coerce').to_numpy()
+    else:
+        due_dates = np.full(len(products_df), np.datetime64('NaT'), dtype='datetime64[ns]')
+    products = ProductTable(
+        ids=product_ids,
+        due_dates=due_dates,
+        units=_float_column(products_df, 'Units to Delivered'),
+        on_hand=_float_column(products_df, 'OnHand'),
+        release_days=_float_column(products_df, 'PlannedOrderRelease').astype(np.int64),
+        penalty_per_day=_float_column(products_df, 'Penalty Per Day[Rs]'),
+        days_from_today=days_from_today
+    )
+
+    machines = _build_machine_table(machines_df)
+    materials = build_material_table(materials_df)
+
+    product_index = {pid: i for i, pid in enumerate(products.ids)}
+    machine_index = {mid: m for m, mid in enumerate(machines.ids)}
+    material_index = {mat: k for k, mat in enumerate(materials.ids)}
+
+    bom_parents = _id_column(bom_df, 'Parent')
+    bom = BomTable(
+        parents=bom_parents,
+        items=_id_column(bom_df, 'Item'),
+        parent_idx=np.array([product_index.get(p, -1) for p in bom_parents], dtype=np.int64),
+        quantity=_float_column(bom_df, 'REQUIREMENTS')
+    )
+
+    return PlantModel(
+        products=products,
+        machines=machines,
+        materials=materials,
+        bom=bom,
+        eligibility=_build_eligibility(product_index, machine_index, eligibility_df),
+        product_index=product_index,
+        machine_index=machine_index,
+        material_index=material_index
+    )
+
+def with_machines(plant_model, machines_df, eligibility_df):
+    """
+    Returns a copy of plant_model whose machines and eligibility come from the given
+    Machines / Eligibility sheets; products, materials and BOM are shared.
+    """
+    machines = _build_machine_table(machines_df)
+    machine_index = {mid: m for m, mid in enumerate(machines.ids)}
+    return replace(
+        plant_model,
+        machines=machines,
+        machine_index=machine_index,
+        eligibility=_build_eligibility(plant_model.product_index, machine_index, eligibility_df)
+    )
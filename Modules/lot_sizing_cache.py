@@ -0,0 +1,113 @@
+# modules/lot_sizing_cache.py
+import hashlib
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from dataclasses import fields
+import pandas as pd
+
+# Bump when lot-sizing logic or MaterialParams changes so persisted entries are not reused
+_CACHE_VERSION = 2
+
+def _canonical_value(value):
+    if value is None:
+        return '<none>'
+    try:
+        if pd.isna(value):
+            return '<nan>'
+    except (TypeError, ValueError):
+        pass
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    try:
+        return repr(float(value))
+    except (TypeError, ValueError):
+        return str(value)
+
+def material_signature(material_params, time_phased_reqs):
+    """
+    Canonical hash of the material's MaterialParams and the requirement vector.
+    Materials with the same signature produce the same lot-sizing result.
+    """
+    params = tuple(
+        (f.name, _canonical_value(getattr(material_params, f.name)))
+        for f in fields(material_params)
+    )
+    reqs = tuple(
+        (pd.Timestamp(d).isoformat(), repr(float(q)))
+        for d, q in sorted(time_phased_reqs.items())
+    )
+    payload = repr((_CACHE_VERSION, params, reqs)).encode('utf-8')
+    return hashlib.sha256(payload).hexdigest()
+
+class LotSizingCache:
+    """
+    Bounded LRU of per-material lot-sizing results keyed by material_signature.
+    If path is given, entries are loaded from that pickle file and written back by save();
+    run_mrp_streaming / run_mrp_and_return_results call save() at the end of a run, other
+    callers must call it themselves. Files from another _CACHE_VERSION are ignored.
+    The file is unpickled, so only point path at a cache this application wrote.
+    """
+
+    def __init__(self, maxsize=4096, path=None):
+        self.maxsize = max(1, int(maxsize))
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        if path is not None and os.path.exists(path):
+            try:
+                with open(path, 'rb') as fh:
+                    stored = pickle.load(fh)
+                if isinstance(stored, dict) and stored.get('version') == _CACHE_VERSION:
+                    for key, value in stored.get('entries', []):
+                        self._store(key, value)
+            except Exception:
+                # unreadable cache file: start empty, it is rewritten on save()
+                self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self._store(key, value)
+
+    def _store(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Writes the entries to path via a temporary file, so readers never see a partial cache."""
+        if self.path is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.lot_sizing_cache.', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                pickle.dump({'version': _CACHE_VERSION, 'entries': list(self._entries.items())}, fh)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': (self.hits / lookups) if lookups else 0.0,
+            'size': len(self._entries),
+            'maxsize': self.maxsize
+        }
@@ -3,17 +3,21 @@ import pandas as pd
 import numpy as np
 import math
 from collections import defaultdict
-from datetime import datetime
+from .utils import resolve_planning_date
+from .lot_sizing_cache import LotSizingCache, material_signature
+from .data_model import MaterialParams, build_material_table
 
 def calculate_day_by_day_plan(material_details, time_phased_reqs, lot_sizing_logic):
-    ordering_cost = float(material_details.get('OrderingCost', 0))
-    holding_cost_per_day = float(material_details.get('HoldingCostPerDay', 0))
-    lead_time = pd.to_timedelta(int(material_details.get('LeadTime', 0)), unit='d')
-    safety_stock = float(material_details.get('SafetyStock', 0))
-    backorder_cost_per_unit_per_day = float(material_details.get(
-        'BackorderCostPerUnitPerDay',
-        material_details.get('BackorderCostPerUnit', 0)
-    ))
+    """
+    material_details: MaterialParams, or a per-material dict (converted once here)
+    """
+    if not isinstance(material_details, MaterialParams):
+        material_details = MaterialParams.from_details(material_details)
+    ordering_cost = material_details.ordering_cost
+    holding_cost_per_day = material_details.holding_cost_per_day
+    lead_time = pd.to_timedelta(material_details.lead_time_days, unit='d')
+    safety_stock = material_details.safety_stock
+    backorder_cost_per_unit_per_day = material_details.backorder_cost_per_day
 
     planning_horizon_dates = sorted(time_phased_reqs.keys())
     if not planning_horizon_dates:
@@ -22,17 +26,11 @@ def calculate_day_by_day_plan(material_details, time_phased_reqs, lot_sizing_log
     start_date, end_date = planning_horizon_dates[0], planning_horizon_dates[-1]
     simulation_dates = pd.date_range(start=start_date, end=end_date, freq='D')
 
-    on_hand_inventory = float(material_details.get('OnHand', material_details.get('ScheduledReceipts', 0)))
+    on_hand_inventory = material_details.opening_stock
 
     scheduled_receipts = defaultdict(float)
-    if 'PlannedOrderReceiptDate' in material_details and pd.notna(material_details.get('PlannedOrderReceiptDate', None)):
-        try:
-            receipt_date = pd.to_datetime(material_details.get('PlannedOrderReceiptDate'))
-            receipt_qty = float(material_details.get('ScheduledReceipts', 0))
-            scheduled_receipts[receipt_date] += receipt_qty
-            on_hand_inventory = float(material_details.get('OnHand', 0))
-        except Exception:
-            pass
+    if material_details.receipt_date is not None:
+        scheduled_receipts[material_details.receipt_date] += material_details.scheduled_receipts
 
     total_holding_cost = 0.0
     orders_placed_count = 0
@@ -97,124 +95,324 @@ def calculate_day_by_day_plan(material_details, time_phased_reqs, lot_sizing_log
     }
     return plan, costs
 
-def run_mrp_and_return_results(products_df, bom_df, materials_df):
+def _requirement_rows(products_df, bom_df, plant_model=None):
     """
-    Inputs: dataframes (clean) for products_df, bom_df, materials_df
-    Returns: dict with procurement_df, comparison_df, material_earliest_receipt, and original dfs
+    Per-BOM-row arrays (items, parent position, quantity) plus per-product need
+    dates and net requirements. Uses the PlantModel arrays when given.
     """
-    # Build materials dict
-    materials_dict = materials_df.set_index('Raw materials').to_dict('index')
+    if plant_model is not None:
+        products, bom = plant_model.products, plant_model.bom
+        net = products.units - products.on_hand
+        need_dates = products.due_dates - products.release_days.astype('timedelta64[D]')
+        return bom.items, bom.parent_idx, bom.quantity, need_dates, net
 
-    gross_reqs = defaultdict(lambda: defaultdict(float))
-    products_df['NetRequirement'] = products_df['Units to Delivered'] - products_df['OnHand']
+    if products_df.empty or bom_df.empty:
+        empty = np.array([], dtype=object)
+        return empty, np.array([], dtype=np.int64), np.array([], dtype=float), empty, np.array([], dtype=float)
+    need_dates = (
+        products_df['Due Date'] - pd.to_timedelta(products_df['PlannedOrderRelease'].astype(int), unit='d')
+    ).to_numpy()
+    net = products_df['NetRequirement'].to_numpy(dtype=float)
+    product_pos = {pid: i for i, pid in enumerate(products_df['Product_ID'])}
+    parent_pos = np.array([product_pos.get(p, -1) for p in bom_df['Parent']], dtype=np.int64)
+    return (bom_df['Item'].to_numpy(dtype=object), parent_pos,
+            bom_df['REQUIREMENTS'].to_numpy(dtype=float), need_dates, net)
 
-    for _, product in products_df[products_df['NetRequirement'] > 0].iterrows():
-        materials_needed_by_date = product['Due Date'] - pd.to_timedelta(int(product['PlannedOrderRelease']), unit='d')
-        product_bom = bom_df[bom_df['Parent'] == product['Product_ID']]
-        for _, component in product_bom.iterrows():
-            gross_reqs[component['Item']][materials_needed_by_date] += float(product['NetRequirement']) * float(component['REQUIREMENTS'])
+def _iter_material_requirements(products_df, bom_df, plant_model=None):
+    """
+    Yields (material_id, time_phased_reqs) one material at a time, in order of
+    first appearance (product order, then BOM order). Only integer row indices
+    over the BOM are held up front; each material's requirements are built when
+    it is reached.
+    """
+    items, parent_pos, quantity, need_dates, net = _requirement_rows(products_df, bom_df, plant_model)
+    rows = np.flatnonzero(parent_pos >= 0)
+    rows = rows[net[parent_pos[rows]] > 0]
+    rows = rows[np.argsort(parent_pos[rows], kind='stable')]
+    codes, material_ids = pd.factorize(items[rows])
+    rows, codes = rows[codes >= 0], codes[codes >= 0]
+    if len(rows) == 0:
+        return
+    rows = rows[np.argsort(codes, kind='stable')]
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=len(material_ids)))))
 
-    all_materials_comparison = []
-    final_plan_records = []
-    material_earliest_receipt = {}
+    for k, material_id in enumerate(material_ids):
+        material_rows = rows[bounds[k]:bounds[k + 1]]
+        parents = parent_pos[material_rows]
+        time_phased_reqs = defaultdict(float)
+        for need_date, net_req, per_unit in zip(pd.DatetimeIndex(need_dates[parents]), net[parents],
+                                                quantity[material_rows]):
+            time_phased_reqs[need_date] += float(net_req) * float(per_unit)
+        yield material_id, time_phased_reqs
 
-    for material_id, time_phased_reqs in gross_reqs.items():
-        material_details = materials_dict.get(material_id)
-        if material_details is None:
-            continue
+def _evaluate_lot_sizing(material_details, time_phased_reqs):
+    """
+    Evaluates LFL, POQ and EOQ for one material (MaterialParams) and picks the cheapest.
+    Returns a material-independent result dict so it can be memoized by signature.
+    """
+    # LFL
+    lfl_logic = lambda date, net_req, all_reqs: net_req
+    lfl_plan, lfl_costs = calculate_day_by_day_plan(material_details, time_phased_reqs, lfl_logic)
 
-        # LFL
-        lfl_logic = lambda date, net_req, all_reqs: net_req
-        lfl_plan, lfl_costs = calculate_day_by_day_plan(material_details, time_phased_reqs, lfl_logic)
-
-        # POQ - search a small window (3..21)
-        best_poq_costs = {'total_cost': float('inf')}
-        best_period = 0
-        for period in range(3, 22):
-            def make_poq_logic(p):
-                def poq_logic(current_date, net_req, all_reqs):
-                    period_end = current_date + pd.to_timedelta(p - 1, unit='d')
-                    return sum(q for d, q in all_reqs.items() if current_date <= d <= period_end)
-                return poq_logic
-            _, current_poq_costs = calculate_day_by_day_plan(material_details, time_phased_reqs, make_poq_logic(period))
-            if current_poq_costs['total_cost'] < best_poq_costs['total_cost']:
-                best_poq_costs = current_poq_costs
-                best_period = period
-
-        def final_poq_logic(current_date, net_req, all_reqs):
-            period_end = current_date + pd.to_timedelta(max(1, best_period) - 1, unit='d')
-            return sum(q for d, q in all_reqs.items() if current_date <= d <= period_end)
-        best_poq_plan, _ = calculate_day_by_day_plan(material_details, time_phased_reqs, final_poq_logic)
-
-        # EOQ
-        total_horizon_demand = sum(time_phased_reqs.values())
-        annual_demand = float(material_details.get('AnnualDemand', np.nan))
-        if np.isnan(annual_demand) or annual_demand <= 0:
-            horizon_days = (max(time_phased_reqs.keys()) - min(time_phased_reqs.keys())).days + 1
-            if horizon_days > 0:
-                annual_demand = (total_horizon_demand / max(1, horizon_days)) * 365
-            else:
-                annual_demand = total_horizon_demand * 12
-        ordering_cost = float(material_details.get('OrderingCost', 0))
-        annual_holding_cost = float(material_details.get('HoldingCostPerDay', 0)) * 365
-        eoq_qty = 0.0
-        if ordering_cost > 0 and annual_holding_cost > 0 and annual_demand > 0:
-            eoq_qty = np.sqrt((2.0 * annual_demand * ordering_cost) / annual_holding_cost)
-            eoq_qty = float(max(1.0, round(eoq_qty)))
-        eoq_logic = lambda date, net_req, all_reqs: eoq_qty if eoq_qty > 0 else net_req
-        eoq_plan, eoq_costs = calculate_day_by_day_plan(material_details, time_phased_reqs, eoq_logic)
-
-        models = {
-            'LFL': lfl_costs,
-            f'POQ (P={best_period} days)': best_poq_costs,
-            f'EOQ (Order Qty={eoq_qty:.0f})': eoq_costs
-        }
-        winner_name = min(models, key=lambda k: models[k]['total_cost'])
-        if 'LFL' in winner_name:
-            recommended_plan = lfl_plan
-        elif 'POQ' in winner_name:
-            recommended_plan = best_poq_plan
+    # POQ - search a small window (3..21)
+    best_poq_costs = {'total_cost': float('inf')}
+    best_period = 0
+    for period in range(3, 22):
+        def make_poq_logic(p):
+            def poq_logic(current_date, net_req, all_reqs):
+                period_end = current_date + pd.to_timedelta(p - 1, unit='d')
+                return sum(q for d, q in all_reqs.items() if current_date <= d <= period_end)
+            return poq_logic
+        _, current_poq_costs = calculate_day_by_day_plan(material_details, time_phased_reqs, make_poq_logic(period))
+        if current_poq_costs['total_cost'] < best_poq_costs['total_cost']:
+            best_poq_costs = current_poq_costs
+            best_period = period
+
+    def final_poq_logic(current_date, net_req, all_reqs):
+        period_end = current_date + pd.to_timedelta(max(1, best_period) - 1, unit='d')
+        return sum(q for d, q in all_reqs.items() if current_date <= d <= period_end)
+    best_poq_plan, _ = calculate_day_by_day_plan(material_details, time_phased_reqs, final_poq_logic)
+
+    # EOQ
+    total_horizon_demand = sum(time_phased_reqs.values())
+    annual_demand = material_details.annual_demand
+    if np.isnan(annual_demand) or annual_demand <= 0:
+        horizon_days = (max(time_phased_reqs.keys()) - min(time_phased_reqs.keys())).days + 1
+        if horizon_days > 0:
+            annual_demand = (total_horizon_demand / max(1, horizon_days)) * 365
         else:
-            recommended_plan = eoq_plan
-
-        earliest = None
-        for ord_rec in recommended_plan:
-            rd = ord_rec.get('Planned_Order_ReceiptDate')
-            if pd.notna(rd):
-                if earliest is None or rd < earliest:
-                    earliest = pd.to_datetime(rd)
-        if earliest is not None:
-            material_earliest_receipt[material_id] = earliest
+            annual_demand = total_horizon_demand * 12
+    ordering_cost = material_details.ordering_cost
+    annual_holding_cost = material_details.holding_cost_per_day * 365
+    eoq_qty = 0.0
+    if ordering_cost > 0 and annual_holding_cost > 0 and annual_demand > 0:
+        eoq_qty = np.sqrt((2.0 * annual_demand * ordering_cost) / annual_holding_cost)
+        eoq_qty = float(max(1.0, round(eoq_qty)))
+    eoq_logic = lambda date, net_req, all_reqs: eoq_qty if eoq_qty > 0 else net_req
+    eoq_plan, eoq_costs = calculate_day_by_day_plan(material_details, time_phased_reqs, eoq_logic)
+
+    models = {
+        'LFL': lfl_costs,
+        f'POQ (P={best_period} days)': best_poq_costs,
+        f'EOQ (Order Qty={eoq_qty:.0f})': eoq_costs
+    }
+    winner_name = min(models, key=lambda k: models[k]['total_cost'])
+    if 'LFL' in winner_name:
+        recommended_plan = lfl_plan
+    elif 'POQ' in winner_name:
+        recommended_plan = best_poq_plan
+    else:
+        recommended_plan = eoq_plan
+
+    return {
+        'LFL_Total_Cost': lfl_costs['total_cost'],
+        'POQ_Total_Cost': best_poq_costs['total_cost'],
+        'EOQ_Total_Cost': eoq_costs['total_cost'],
+        'Recommended_Model': winner_name,
+        'Winner_Total_Cost': models[winner_name]['total_cost'],
+        'recommended_plan': recommended_plan
+    }
+
+def _plan_material(material_id, material_details, time_phased_reqs, lot_sizing_cache=None, planning_date=None):
+    """
+    Runs (or fetches from lot_sizing_cache) the lot-sizing evaluation for one
+    material (MaterialParams) and labels the result with material_id. Stocked materials with no
+    orders are ready on planning_date.
+    Returns (comparison_row, plan_records, earliest_receipt).
+    """
+    if lot_sizing_cache is not None:
+        signature = material_signature(material_details, time_phased_reqs)
+        evaluation = lot_sizing_cache.get(signature)
+        if evaluation is None:
+            evaluation = _evaluate_lot_sizing(material_details, time_phased_reqs)
+            lot_sizing_cache.put(signature, evaluation)
+    else:
+        evaluation = _evaluate_lot_sizing(material_details, time_phased_reqs)
+    recommended_plan = evaluation['recommended_plan']
+    winner_name = evaluation['Recommended_Model']
+
+    earliest = None
+    for ord_rec in recommended_plan:
+        rd = ord_rec.get('Planned_Order_ReceiptDate')
+        if pd.notna(rd):
+            if earliest is None or rd < earliest:
+                earliest = pd.to_datetime(rd)
+    if earliest is None:
+        if material_details.on_hand > 0:
+            earliest = resolve_planning_date(planning_date)
         else:
-            on_hand = float(material_details.get('OnHand', 0))
-            if on_hand > 0:
-                material_earliest_receipt[material_id] = pd.Timestamp(datetime.today().date())
+            earliest = max(time_phased_reqs.keys()) + pd.Timedelta(days=365)
+
+    comparison_row = {
+        'RawMaterial_ID': material_id,
+        'LFL_Total_Cost': evaluation['LFL_Total_Cost'],
+        'POQ_Total_Cost': evaluation['POQ_Total_Cost'],
+        'EOQ_Total_Cost': evaluation['EOQ_Total_Cost'],
+        'Recommended_Model': winner_name,
+        'Winner_Total_Cost': evaluation['Winner_Total_Cost']
+    }
+    plan_records = [
+        {**order, 'RawMaterial_ID': material_id, 'LotSizingModel_Used': winner_name}
+        for order in recommended_plan
+    ]
+    return comparison_row, plan_records, earliest
+
+PROCUREMENT_COLUMNS = {
+    'Requirement_Date': 'datetime64[ns]',
+    'Net_Requirement': 'float64',
+    'Planned_Order_Qty': 'float64',
+    'Planned_Order_Release': 'datetime64[ns]',
+    'Planned_Order_ReceiptDate': 'datetime64[ns]',
+    'RawMaterial_ID': 'object',
+    'LotSizingModel_Used': 'object'
+}
+
+def _iter_planned_materials(products_df, bom_df, materials_df, lot_sizing_cache, plant_model, planning_date):
+    """
+    Plans every material with requirements, in first-appearance order.
+    Yields (material_id, comparison_row, plan_records, earliest_receipt).
+    """
+    products_df['NetRequirement'] = products_df['Units to Delivered'] - products_df['OnHand']
+    if plant_model is not None:
+        materials, material_pos = plant_model.materials, plant_model.material_index
+    else:
+        materials = build_material_table(materials_df)
+        material_pos = {mid: k for k, mid in enumerate(materials.ids)}
+
+    for material_id, time_phased_reqs in _iter_material_requirements(products_df, bom_df, plant_model):
+        k = material_pos.get(material_id)
+        if k is None:
+            continue
+        material_details = materials.params(k)
+        comparison_row, plan_records, earliest = _plan_material(
+            material_id, material_details, time_phased_reqs, lot_sizing_cache, planning_date
+        )
+        yield material_id, comparison_row, plan_records, earliest
+
+def run_mrp_and_return_results(products_df, bom_df, materials_df, lot_sizing_cache=None, plant_model=None,
+                               planning_date=None):
+    """
+    Inputs: dataframes (clean) for products_df, bom_df, materials_df
+    lot_sizing_cache: optional LotSizingCache to share (or persist) across runs; a fresh one is used per run otherwise
+    plant_model: optional PlantModel from load_workbook; requirements are then taken from its arrays
+    planning_date: date treated as "today" (defaults to the current date); passed on to scheduling via the results
+    Returns: dict with procurement_df, comparison_df, material_earliest_receipt, lot_sizing_cache stats,
+             plant_model, planning_date and original dfs
+    """
+    if lot_sizing_cache is None:
+        lot_sizing_cache = LotSizingCache()
+    results = run_mrp_streaming(
+        products_df, bom_df, materials_df, sink=None, chunk_size=None,
+        lot_sizing_cache=lot_sizing_cache, plant_model=plant_model, planning_date=planning_date
+    )
+    del results['procurement_sink']
+    return results
+
+def iter_mrp_chunks(products_df, bom_df, materials_df, chunk_size=500, lot_sizing_cache=None, plant_model=None,
+                    planning_date=None):
+    """
+    Streaming variant of run_mrp_and_return_results.
+    Plans materials in groups of chunk_size (None for a single group) and yields one dict per
+    group with procurement_df, comparison_df and material_earliest_receipt for that group only.
+    Lot sizing is only memoized when a lot_sizing_cache is passed.
+    """
+    planning_date = resolve_planning_date(planning_date)
+    chunk_size = None if chunk_size is None else max(1, int(chunk_size))
+
+    comparison_rows = []
+    plan_records = []
+    earliest_receipts = {}
+    for material_id, comparison_row, material_plan, earliest in _iter_planned_materials(
+            products_df, bom_df, materials_df, lot_sizing_cache, plant_model, planning_date):
+        comparison_rows.append(comparison_row)
+        plan_records.extend(material_plan)
+        earliest_receipts[material_id] = earliest
+        if chunk_size is not None and len(comparison_rows) >= chunk_size:
+            yield {
+                'procurement_df': pd.DataFrame(plan_records),
+                'comparison_df': pd.DataFrame(comparison_rows).round(2),
+                'material_earliest_receipt': earliest_receipts
+            }
+            comparison_rows, plan_records, earliest_receipts = [], [], {}
+
+    if comparison_rows:
+        yield {
+            'procurement_df': pd.DataFrame(plan_records),
+            'comparison_df': pd.DataFrame(comparison_rows).round(2),
+            'material_earliest_receipt': earliest_receipts
+        }
+
+def _append_to_sink(df, sink, writer_state):
+    """
+    Appends one procurement chunk to a .csv or .parquet file.
+    writer_state keeps the open Parquet writer / CSV header flag between chunks.
+    """
+    if str(sink).lower().endswith('.parquet'):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Writing procurement orders to Parquet requires pyarrow") from exc
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if writer_state.get('writer') is None:
+            writer_state['writer'] = pq.ParquetWriter(str(sink), table.schema)
+        writer_state['writer'].write_table(table.cast(writer_state['writer'].schema))
+    else:
+        df.to_csv(sink, mode='a' if writer_state.get('header_written') else 'w',
+                  header=not writer_state.get('header_written'), index=False)
+        writer_state['header_written'] = True
+
+def run_mrp_streaming(products_df, bom_df, materials_df, sink=None, chunk_size=500, lot_sizing_cache=None,
+                      plant_model=None, planning_date=None):
+    """
+    Runs MRP chunk by chunk. Requirements are built and planned chunk_size materials
+    at a time; only integer indices over the BOM and the typed MaterialTable are held for the whole run.
+    With a sink path (.csv or .parquet) procurement orders are written as they are
+    planned and procurement_df is returned empty; the sink is always (re)written, with just
+    the header/schema when no orders are planned. Without a sink the chunks are concatenated.
+    comparison_df and material_earliest_receipt are accumulated incrementally.
+    No lot_sizing_cache is used unless one is passed, so memory stays bounded by chunk_size;
+    'lot_sizing_cache_stats' is then None. A passed cache with a path is saved once the run completes.
+    Returns the same dict as run_mrp_and_return_results plus 'procurement_sink'.
+    """
+    comparison_frames = []
+    procurement_frames = []
+    material_earliest_receipt = {}
+    writer_state = {}
+    planning_date = resolve_planning_date(planning_date)
+    try:
+        for chunk in iter_mrp_chunks(products_df, bom_df, materials_df, chunk_size=chunk_size,
+                                     lot_sizing_cache=lot_sizing_cache, plant_model=plant_model,
+                                     planning_date=planning_date):
+            comparison_frames.append(chunk['comparison_df'])
+            material_earliest_receipt.update(chunk['material_earliest_receipt'])
+            if chunk['procurement_df'].empty:
+                continue
+            if sink is not None:
+                _append_to_sink(chunk['procurement_df'], sink, writer_state)
             else:
-                material_earliest_receipt[material_id] = max(time_phased_reqs.keys()) + pd.Timedelta(days=365)
-
-        all_materials_comparison.append({
-            'RawMaterial_ID': material_id,
-            'LFL_Total_Cost': lfl_costs['total_cost'],
-            'POQ_Total_Cost': best_poq_costs['total_cost'],
-            'EOQ_Total_Cost': eoq_costs['total_cost'],
-            'Recommended_Model': winner_name,
-            'Winner_Total_Cost': models[winner_name]['total_cost']
-        })
-
-        for order in recommended_plan:
-            final_plan_records.append({
-                **order,
-                'RawMaterial_ID': material_id,
-                'LotSizingModel_Used': winner_name
-            })
-
-    procurement_df = pd.DataFrame(final_plan_records)
-    comparison_df = pd.DataFrame(all_materials_comparison).round(2)
+                procurement_frames.append(chunk['procurement_df'])
+        if sink is not None and not writer_state:
+            # no orders planned: still replace whatever a previous run left at sink
+            empty_plan = pd.DataFrame({col: pd.Series(dtype=dtype) for col, dtype in PROCUREMENT_COLUMNS.items()})
+            _append_to_sink(empty_plan, sink, writer_state)
+    finally:
+        if writer_state.get('writer') is not None:
+            writer_state['writer'].close()
+    if lot_sizing_cache is not None:
+        lot_sizing_cache.save()
+
+    procurement_df = pd.concat(procurement_frames, ignore_index=True) if procurement_frames else pd.DataFrame()
+    comparison_df = pd.concat(comparison_frames, ignore_index=True) if comparison_frames else pd.DataFrame()
 
     return {
         'procurement_df': procurement_df,
+        'procurement_sink': sink,
         'comparison_df': comparison_df,
         'material_earliest_receipt': material_earliest_receipt,
+        'lot_sizing_cache_stats': lot_sizing_cache.stats() if lot_sizing_cache is not None else None,
+        'plant_model': plant_model,
+        'planning_date': planning_date,
         'products_df': products_df,
         'bom_df': bom_df,
         'materials_df': materials_df
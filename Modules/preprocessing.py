@@ -1,6 +1,193 @@
 # modules/preprocessing.py
 import pandas as pd
 from io import BytesIO
+from .data_model import build_plant_model
+
+# Declared input schema: sheet -> {column: (kind, required)}
+# kind: 'id' (unique key), 'str', 'float', 'date' or 'flag' (0/1 or boolean); '*' applies to every other column.
+# Required columns must exist and have no blanks; optional ones are type-checked when present.
+SHEET_SCHEMAS = {
+    'product details': {
+        'Product_ID': ('id', True),
+        'Due Date': ('date', True),
+        'Units to Delivered': ('float', True),
+        'OnHand': ('float', False),
+        'PlannedOrderRelease': ('float', False),
+        'Penalty Per Day[Rs]': ('float', False),
+        'Days from Today': ('float', False),
+    },
+    'Bill of materials': {
+        'Parent': ('str', True),
+        'Item': ('str', True),
+        'REQUIREMENTS': ('float', True),
+    },
+    'raw material details ': {
+        'Raw materials': ('id', True),
+        'OrderingCost': ('float', False),
+        'HoldingCostPerDay': ('float', False),
+        'LeadTime': ('float', False),
+        'SafetyStock': ('float', False),
+        'OnHand': ('float', False),
+        'ScheduledReceipts': ('float', False),
+        'PlannedOrderReceiptDate': ('date', False),
+        'BackorderCostPerUnitPerDay': ('float', False),
+        'BackorderCostPerUnit': ('float', False),
+        'AnnualDemand': ('float', False),
+    },
+    'Machines': {
+        'Machine / Vessel ID': ('id', True),
+        'Running Cost Per Hour in Rs': ('float', False),
+        'Cycle Time in Hours Per Batch': ('float', False),
+        'Volume[Capacity] in Units Per batch': ('float', False),
+        'PreMaintenanceHours': ('float', False),
+        'PostMaintenanceHours': ('float', False),
+    },
+    'Eligibility': {
+        'Product_ID': ('str', True),
+        '*': ('flag', False),
+    },
+}
+
+# Sheets that may be absent/empty (scheduling then treats every machine as eligible)
+OPTIONAL_SHEETS = {'Eligibility'}
+
+# '*' columns are only checked when their name is a key of this (sheet, column); other
+# columns are reported once as a warning and ignored, e.g. a 'Product Name' column.
+WILDCARD_KEYS = {
+    'Eligibility': ('Machines', 'Machine / Vessel ID'),
+}
+
+# Cross-sheet references: (sheet, column) values must appear in (sheet, column).
+# 'error' rejects the workbook; 'warning' rows are reported and ignored downstream.
+SHEET_REFERENCES = [
+    ('Bill of materials', 'Item', 'raw material details ', 'Raw materials', 'error'),
+    ('Bill of materials', 'Parent', 'product details', 'Product_ID', 'warning'),
+    ('Eligibility', 'Product_ID', 'product details', 'Product_ID', 'warning'),
+]
+
+class WorkbookValidationError(ValueError):
+    """Raised by load_workbook with every schema problem (errors and warnings) found in the workbook."""
+
+    def __init__(self, issues):
+        self.issues = issues
+        n_errors = sum(is_error(i) for i in issues)
+        super().__init__(
+            f"{n_errors} problem(s) in input workbook:\n" + "\n".join(format_issue(i) for i in issues)
+        )
+
+def is_error(issue):
+    return issue.get('severity', 'error') == 'error'
+
+def format_issue(issue):
+    where = f"sheet '{issue['sheet']}'"
+    if not is_error(issue):
+        where = f"warning: {where}"
+    if issue.get('column') is not None:
+        where += f", column '{issue['column']}'"
+    if issue.get('rows'):
+        rows = issue['rows']
+        shown = ", ".join(str(r) for r in rows[:10]) + (f" (+{len(rows) - 10} more)" if len(rows) > 10 else "")
+        where += f", row(s) {shown}"
+    return f"{where}: {issue['message']}"
+
+def _is_text(series):
+    # read_excel gives str columns object or StringDtype depending on the pandas version
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+def _excel_rows(series, mask):
+    """Excel row numbers (header is row 1) of the rows selected by mask."""
+    return [int(i) + 2 for i in series.index[mask]]
+
+def _check_column(sheet, col, series, kind, required):
+    """Vectorized checks for one column."""
+    issues = []
+    excel_rows = lambda mask: _excel_rows(series, mask)
+
+    blank = series.isna()
+    if _is_text(series):
+        blank = blank | (series.astype(str).str.strip() == '')
+    if required and blank.any():
+        issues.append({'sheet': sheet, 'column': col, 'rows': excel_rows(blank), 'message': 'missing value'})
+
+    present = ~blank
+    if kind in ('float', 'flag'):
+        values = series.astype(float) if series.dtype == bool else pd.to_numeric(series, errors='coerce')
+        bad = present & values.isna()
+        if bad.any():
+            issues.append({'sheet': sheet, 'column': col, 'rows': excel_rows(bad), 'message': 'not a number'})
+    elif kind == 'date':
+        bad = present & pd.to_datetime(series, errors='coerce').isna()
+        if bad.any():
+            issues.append({'sheet': sheet, 'column': col, 'rows': excel_rows(bad), 'message': 'not a date'})
+    elif kind == 'id':
+        dup = present & series.duplicated(keep=False)
+        if dup.any():
+            issues.append({'sheet': sheet, 'column': col, 'rows': excel_rows(dup), 'message': 'duplicate ID'})
+    return issues
+
+def _key_values(sheets_by_name, sheet, col):
+    """Set of values in sheet/col, or None when the sheet or column is missing (reported elsewhere)."""
+    df = sheets_by_name.get(sheet)
+    if df is None or df.empty or col not in df.columns:
+        return None
+    return set(df[col].dropna())
+
+def _check_references(sheets_by_name, references):
+    issues = []
+    for sheet, col, target_sheet, target_col, severity in references:
+        df = sheets_by_name.get(sheet)
+        keys = _key_values(sheets_by_name, target_sheet, target_col)
+        if df is None or df.empty or col not in df.columns or keys is None:
+            continue
+        series = df[col]
+        unknown = series.notna() & ~series.isin(keys)
+        if unknown.any():
+            issues.append({
+                'sheet': sheet, 'column': col, 'rows': _excel_rows(series, unknown), 'severity': severity,
+                'message': f"not found in sheet '{target_sheet}', column '{target_col}'"
+            })
+    return issues
+
+def validate_sheets(sheets_by_name, schemas=SHEET_SCHEMAS, wildcard_keys=WILDCARD_KEYS, references=SHEET_REFERENCES):
+    """
+    Checks every sheet against its declared schema, then the cross-sheet references.
+    sheets_by_name: {sheet name: DataFrame}. Returns a list of issue dicts
+    (sheet, column, rows, message and, for non-fatal issues, severity='warning');
+    the workbook is valid when no issue is an error.
+    """
+    issues = []
+    for sheet, schema in schemas.items():
+        df = sheets_by_name.get(sheet)
+        if df is None or df.empty:
+            if sheet not in OPTIONAL_SHEETS:
+                issues.append({'sheet': sheet, 'column': None, 'rows': [], 'message': 'sheet is missing or empty'})
+            continue
+        for col, (kind, required) in schema.items():
+            if col == '*':
+                continue
+            if col not in df.columns:
+                if required:
+                    issues.append({'sheet': sheet, 'column': col, 'rows': [], 'message': 'required column is missing'})
+                continue
+            issues.extend(_check_column(sheet, col, df[col], kind, required))
+        if '*' in schema:
+            kind, required = schema['*']
+            keys = None
+            if sheet in wildcard_keys:
+                key_sheet, key_col = wildcard_keys[sheet]
+                keys = _key_values(sheets_by_name, key_sheet, key_col) or set()
+            for col in df.columns:
+                if col in schema:
+                    continue
+                if keys is not None and col not in keys:
+                    issues.append({
+                        'sheet': sheet, 'column': col, 'rows': [], 'severity': 'warning',
+                        'message': f"not an ID in sheet '{key_sheet}', column '{key_col}'; column ignored"
+                    })
+                    continue
+                issues.extend(_check_column(sheet, col, df[col], kind, required))
+    issues.extend(_check_references(sheets_by_name, references))
+    return issues
 
 def _safe_read_excel(file_like, sheet_name, parse_dates=None):
     try:
@@ -9,10 +196,12 @@ def _safe_read_excel(file_like, sheet_name, parse_dates=None):
         # return empty DF with no error (caller should handle)
         return pd.DataFrame()
 
-def load_workbook(file_like):
+def load_workbook(file_like, validate=True):
     """
-    Read the required sheets and perform basic cleanup/normalization.
-    Returns dict with products_df, bom_df, materials_df, machines_df, eligibility_df
+    Read the required sheets, validate them against SHEET_SCHEMAS and perform basic cleanup/normalization.
+    Raises WorkbookValidationError listing every problem when validate is True and any of them is an error.
+    Returns dict with products_df, bom_df, materials_df, machines_df, eligibility_df, plant_model
+    and validation_warnings (non-fatal issues)
     """
     # We use BytesIO so pandas can read multiple times
     if isinstance(file_like, BytesIO):
@@ -20,16 +209,14 @@ def load_workbook(file_like):
     else:
         buffer = BytesIO(file_like.read()) if hasattr(file_like, "read") else BytesIO(file_like)
 
-    # Read sheets
-    products_df = _safe_read_excel(buffer, sheet_name='product details', parse_dates=['Due Date'])
+    # Read sheets as-is; dates are converted after validation so a missing
+    # date column is reported as such instead of failing the whole sheet read
+    products_df = _safe_read_excel(buffer, sheet_name='product details')
     # reset buffer pointer for next read
     buffer.seek(0)
     bom_df = _safe_read_excel(buffer, sheet_name='Bill of materials')
     buffer.seek(0)
-    temp_materials_df = _safe_read_excel(buffer, sheet_name='raw material details ')
-    buffer.seek(0)
-    parse_dates_flag = ['PlannedOrderReceiptDate'] if 'PlannedOrderReceiptDate' in temp_materials_df.columns else False
-    materials_df = _safe_read_excel(buffer, sheet_name='raw material details ', parse_dates=parse_dates_flag)
+    materials_df = _safe_read_excel(buffer, sheet_name='raw material details ')
     buffer.seek(0)
     machines_df = _safe_read_excel(buffer, sheet_name='Machines')
     buffer.seek(0)
@@ -38,10 +225,28 @@ def load_workbook(file_like):
     # Basic cleanup same as original
     for df, cols in [(products_df, ['Product_ID']), (bom_df, ['Parent', 'Item']), (materials_df, ['Raw materials'])]:
         for col in cols:
-            if col in df.columns and df[col].dtype == object:
+            if col in df.columns and _is_text(df[col]):
                 df[col] = df[col].str.strip()
 
-    # Numeric coercions used downstream
+    warnings = []
+    if validate:
+        issues = validate_sheets({
+            'product details': products_df,
+            'Bill of materials': bom_df,
+            'raw material details ': materials_df,
+            'Machines': machines_df,
+            'Eligibility': eligibility_df
+        })
+        if any(is_error(i) for i in issues):
+            raise WorkbookValidationError(issues)
+        warnings = issues
+
+    # Date and numeric coercions used downstream
+    if 'Due Date' in products_df.columns:
+        products_df['Due Date'] = pd.to_datetime(products_df['Due Date'], errors='coerce')
+    if 'PlannedOrderReceiptDate' in materials_df.columns:
+        materials_df['PlannedOrderReceiptDate'] = pd.to_datetime(materials_df['PlannedOrderReceiptDate'], errors='coerce')
+
     if 'PlannedOrderRelease' in products_df.columns:
         products_df['PlannedOrderRelease'] = pd.to_numeric(products_df.get('PlannedOrderRelease', 0), errors='coerce').fillna(0)
     else:
@@ -50,10 +255,14 @@ def load_workbook(file_like):
     products_df['Units to Delivered'] = pd.to_numeric(products_df.get('Units to Delivered', 0), errors='coerce').fillna(0)
     products_df['OnHand'] = pd.to_numeric(products_df.get('OnHand', 0), errors='coerce').fillna(0)
 
+    plant_model = build_plant_model(products_df, bom_df, materials_df, machines_df, eligibility_df)
+
     return {
         'products_df': products_df,
         'bom_df': bom_df,
         'materials_df': materials_df,
         'machines_df': machines_df,
-        'eligibility_df': eligibility_df
+        'eligibility_df': eligibility_df,
+        'plant_model': plant_model,
+        'validation_warnings': warnings
     }
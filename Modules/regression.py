@@ -0,0 +1,397 @@
+# modules/regression.py
+"""
+Deterministic regression / performance-equivalence harness for MRP and scheduling.
+
+Runs the frozen reference engine (_reference_mrp / _reference_scheduling, the
+original algorithms) and the current engine, in-memory and streaming to a CSV sink,
+on generated workbooks of increasing size with a fixed planning date; the current
+engine reads each workbook back through .xlsx and load_workbook. It checks that procurement plans and lot-sizing
+costs are identical, that MILP objectives agree within tolerance, and records the
+speedup. Golden outputs are stored as CSV/JSON under tests/golden and re-checked by
+the test suite.
+
+    python -m Modules.regression                                   # reference vs candidate report
+    python -m Modules.regression --golden-dir tests/golden --update  # (re)write golden fixtures
+    python -m Modules.regression --golden-dir tests/golden           # check against them
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from io import BytesIO, StringIO
+import numpy as np
+import pandas as pd
+import pulp
+from . import _reference_mrp, _reference_scheduling
+from .data_model import build_plant_model
+from .mrp_core import PROCUREMENT_COLUMNS, run_mrp_and_return_results, run_mrp_streaming
+from .preprocessing import load_workbook
+from .scheduling_core import run_scheduling_with_mrp_integration
+from .utils import resolve_planning_date
+
+DEFAULT_PLANNING_DATE = '2030-01-01'
+# (products, materials, machines)
+DEFAULT_SIZES = [(5, 10, 2), (15, 40, 3), (40, 150, 4)]
+
+def generate_workbook(n_products, n_materials, n_machines, seed=0, planning_date=DEFAULT_PLANNING_DATE):
+    """
+    Builds the dict load_workbook would return for a synthetic plant.
+    Output depends only on the arguments. Materials come in groups sharing cost
+    parameters, and the last n_materials // 5 materials duplicate the first ones
+    (same parameters and same BOM usage), so memoized lot sizing gets cache hits
+    whose results must be relabelled per material.
+    """
+    rng = np.random.default_rng(seed)
+    start = resolve_planning_date(planning_date)
+    product_ids = [f'P{i:04d}' for i in range(n_products)]
+    material_ids = [f'RM{k:05d}' for k in range(n_materials)]
+    machine_ids = [f'MC{m:03d}' for m in range(n_machines)]
+
+    products_df = pd.DataFrame({
+        'Product_ID': product_ids,
+        'Due Date': start + pd.to_timedelta(rng.integers(7, 90, n_products), unit='D'),
+        'Units to Delivered': rng.integers(50, 1000, n_products).astype(float),
+        'OnHand': rng.integers(0, 40, n_products).astype(float),
+        'PlannedOrderRelease': rng.integers(0, 6, n_products).astype(float),
+        'Penalty Per Day[Rs]': rng.integers(100, 2000, n_products).astype(float)
+    })
+
+    n_twins = n_materials // 5
+    n_base = n_materials - n_twins
+    bom_rows = []
+    per_product = min(4, n_base)
+    for pid in product_ids:
+        for k in rng.choice(n_base, per_product, replace=False):
+            qty = float(rng.integers(1, 5))
+            bom_rows.append({'Parent': pid, 'Item': material_ids[k], 'REQUIREMENTS': qty})
+            if k < n_twins:
+                bom_rows.append({'Parent': pid, 'Item': material_ids[n_base + k], 'REQUIREMENTS': qty})
+    bom_df = pd.DataFrame(bom_rows, columns=['Parent', 'Item', 'REQUIREMENTS'])
+
+    n_profiles = max(1, n_base // 4)
+    profile = rng.integers(0, n_profiles, n_base)
+    ordering = rng.integers(20, 200, n_profiles).astype(float)
+    holding = np.round(rng.random(n_profiles), 2) + 0.05
+    lead = rng.integers(1, 8, n_profiles)
+    safety = rng.integers(0, 30, n_profiles).astype(float)
+    on_hand = np.where(rng.random(n_base) < 0.2, rng.integers(1, 100, n_base), 0).astype(float)
+    profile = np.concatenate([profile, profile[:n_twins]])
+    on_hand = np.concatenate([on_hand, on_hand[:n_twins]])
+    materials_df = pd.DataFrame({
+        'Raw materials': material_ids,
+        'OrderingCost': ordering[profile],
+        'HoldingCostPerDay': holding[profile],
+        'LeadTime': lead[profile],
+        'SafetyStock': safety[profile],
+        'OnHand': on_hand
+    })
+
+    machines_df = pd.DataFrame({
+        'Machine / Vessel ID': machine_ids,
+        'Running Cost Per Hour in Rs': rng.integers(100, 800, n_machines).astype(float),
+        'Cycle Time in Hours Per Batch': rng.integers(2, 10, n_machines).astype(float),
+        'Volume[Capacity] in Units Per batch': rng.integers(50, 300, n_machines).astype(float),
+        'PreMaintenanceHours': rng.integers(0, 3, n_machines).astype(float),
+        'PostMaintenanceHours': rng.integers(0, 3, n_machines).astype(float)
+    })
+
+    eligibility_df = pd.DataFrame({'Product_ID': product_ids})
+    for m, mid in enumerate(machine_ids):
+        # first machine takes everything so every product stays feasible
+        eligibility_df[mid] = 1 if m == 0 else rng.integers(0, 2, n_products)
+
+    return {
+        'products_df': products_df,
+        'bom_df': bom_df,
+        'materials_df': materials_df,
+        'machines_df': machines_df,
+        'eligibility_df': eligibility_df,
+        'plant_model': build_plant_model(products_df, bom_df, materials_df, machines_df, eligibility_df)
+    }
+
+def reference_engine():
+    """The original, unoptimized MRP and scheduling algorithms (frozen copies)."""
+    return {
+        'mrp': lambda sheets, planning_date: _reference_mrp.run_mrp_and_return_results(
+            sheets['products_df'], sheets['bom_df'], sheets['materials_df'], planning_date=planning_date
+        ),
+        'scheduling': _reference_scheduling.run_scheduling_with_mrp_integration
+    }
+
+def candidate_engine():
+    """The current engines with their fast paths: plant model arrays and memoized lot sizing."""
+    return {
+        'mrp': lambda sheets, planning_date: run_mrp_and_return_results(
+            sheets['products_df'], sheets['bom_df'], sheets['materials_df'],
+            plant_model=sheets['plant_model'], planning_date=planning_date
+        ),
+        'scheduling': run_scheduling_with_mrp_integration
+    }
+
+SHEET_NAMES = {
+    'products_df': 'product details',
+    'bom_df': 'Bill of materials',
+    'materials_df': 'raw material details ',
+    'machines_df': 'Machines',
+    'eligibility_df': 'Eligibility'
+}
+
+def workbook_bytes(sheets):
+    """Writes generated sheets to an in-memory .xlsx laid out like the app's input workbook."""
+    buffer = BytesIO()
+    with pd.ExcelWriter(buffer) as writer:
+        for key, sheet_name in SHEET_NAMES.items():
+            sheets[key].to_excel(writer, sheet_name=sheet_name, index=False)
+    buffer.seek(0)
+    return buffer
+
+def _read_procurement_csv(path):
+    dates = [col for col, dtype in PROCUREMENT_COLUMNS.items() if dtype.startswith('datetime')]
+    return pd.read_csv(path, parse_dates=dates, dtype={'RawMaterial_ID': str, 'LotSizingModel_Used': str})
+
+def streaming_candidate_engine(chunk_size=3):
+    """
+    The current engine in streaming mode: small chunks, procurement orders written to a
+    CSV sink and read back, default (no) lot-sizing cache.
+    """
+    def run_mrp(sheets, planning_date):
+        with tempfile.TemporaryDirectory() as tmp:
+            sink = os.path.join(tmp, 'procurement.csv')
+            results = run_mrp_streaming(
+                sheets['products_df'], sheets['bom_df'], sheets['materials_df'], sink=sink,
+                chunk_size=chunk_size, plant_model=sheets['plant_model'], planning_date=planning_date
+            )
+            results['procurement_df'] = _read_procurement_csv(sink)
+        return results
+    return {'mrp': run_mrp, 'scheduling': run_scheduling_with_mrp_integration}
+
+def candidate_engines():
+    """Every candidate the harness checks against the reference, by name."""
+    return {'in-memory': candidate_engine(), 'streaming': streaming_candidate_engine()}
+
+def run_pipeline(sheets, engine, planning_date=DEFAULT_PLANNING_DATE, include_scheduling=True):
+    """
+    Runs MRP (and scheduling) with engine on a copy of sheets.
+    Returns the outputs compared by the harness plus wall-clock timings.
+    """
+    sheets = {k: (v.copy() if isinstance(v, pd.DataFrame) else v) for k, v in sheets.items()}
+    started = time.perf_counter()
+    mrp_results = engine['mrp'](sheets, planning_date)
+    mrp_seconds = time.perf_counter() - started
+
+    objective_value = None
+    scheduling_seconds = 0.0
+    if include_scheduling:
+        started = time.perf_counter()
+        sched_results = engine['scheduling'](
+            mrp_results, sheets['machines_df'], sheets['eligibility_df'],
+            planning_date=planning_date, solver=pulp.PULP_CBC_CMD(msg=False)
+        )
+        scheduling_seconds = time.perf_counter() - started
+        objective_value = sched_results.get('objective_value')
+
+    return {
+        'procurement_df': mrp_results['procurement_df'],
+        'comparison_df': mrp_results['comparison_df'],
+        'material_earliest_receipt': mrp_results['material_earliest_receipt'],
+        'objective_value': objective_value,
+        'lot_sizing_cache_stats': mrp_results.get('lot_sizing_cache_stats'),
+        'mrp_seconds': mrp_seconds,
+        'scheduling_seconds': scheduling_seconds
+    }
+
+def _frame_mismatch(name, expected, actual):
+    try:
+        pd.testing.assert_frame_equal(
+            expected.reset_index(drop=True), actual.reset_index(drop=True),
+            check_dtype=False, check_exact=True
+        )
+    except AssertionError as exc:
+        return f"{name} differs: {str(exc).splitlines()[0]}"
+    return None
+
+def compare_results(expected, actual, objective_tol=1e-6):
+    """
+    Returns a list of differences between two run_pipeline outputs (empty when equivalent).
+    Plans and lot-sizing costs must match exactly; objectives within objective_tol (relative).
+    """
+    problems = []
+    for name in ('procurement_df', 'comparison_df'):
+        mismatch = _frame_mismatch(name, expected[name], actual[name])
+        if mismatch:
+            problems.append(mismatch)
+    if expected['material_earliest_receipt'] != actual['material_earliest_receipt']:
+        problems.append("material_earliest_receipt differs")
+    exp_obj, act_obj = expected.get('objective_value'), actual.get('objective_value')
+    if exp_obj is not None or act_obj is not None:
+        if exp_obj is None or act_obj is None:
+            problems.append(f"objective_value differs: {exp_obj} vs {act_obj}")
+        elif abs(exp_obj - act_obj) > objective_tol * max(1.0, abs(exp_obj)):
+            problems.append(f"objective_value differs: {exp_obj} vs {act_obj}")
+    return problems
+
+def run_equivalence_harness(reference=None, candidates=None, sizes=DEFAULT_SIZES, seed=0,
+                            planning_date=DEFAULT_PLANNING_DATE, objective_tol=1e-6, include_scheduling=True,
+                            via_xlsx=True):
+    """
+    Runs the reference engine and every candidate ({name: engine}, candidate_engines() by default)
+    on generated workbooks of increasing size. With via_xlsx the candidates read the workbook back
+    through an .xlsx file and load_workbook, as the app does; the reference uses the generated frames.
+    Returns a DataFrame with timings, speedups and cache hits per size and candidate; raises
+    AssertionError listing every size/candidate whose outputs are not equivalent.
+    """
+    reference = reference or reference_engine()
+    candidates = candidates or candidate_engines()
+    rows = []
+    failures = []
+    for n_products, n_materials, n_machines in sizes:
+        sheets = generate_workbook(n_products, n_materials, n_machines, seed=seed, planning_date=planning_date)
+        candidate_sheets = load_workbook(workbook_bytes(sheets)) if via_xlsx else sheets
+        ref_out = run_pipeline(sheets, reference, planning_date, include_scheduling)
+        size_label = f"{n_products}x{n_materials}x{n_machines}"
+        for name, candidate in candidates.items():
+            cand_out = run_pipeline(candidate_sheets, candidate, planning_date, include_scheduling)
+            problems = compare_results(ref_out, cand_out, objective_tol)
+            if problems:
+                failures.append(f"{size_label} ({name}): " + "; ".join(problems))
+            cache_stats = cand_out['lot_sizing_cache_stats'] or {}
+            rows.append({
+                'Size (products x materials x machines)': size_label,
+                'Candidate': name,
+                'Reference_MRP_s': ref_out['mrp_seconds'],
+                'Candidate_MRP_s': cand_out['mrp_seconds'],
+                'MRP_Speedup': ref_out['mrp_seconds'] / max(cand_out['mrp_seconds'], 1e-9),
+                'Reference_Scheduling_s': ref_out['scheduling_seconds'],
+                'Candidate_Scheduling_s': cand_out['scheduling_seconds'],
+                'Cache_Hits': cache_stats.get('hits', 0),
+                'Objective_Value': cand_out['objective_value'],
+                'Equivalent': not problems
+            })
+    report = pd.DataFrame(rows)
+    if failures:
+        raise AssertionError("Engines are not equivalent:\n" + "\n".join(failures) + f"\n{report.to_string()}")
+    return report
+
+# Golden fixtures: <golden_dir>/<P>x<M>x<K>/{procurement.csv, comparison.csv, summary.json}
+GOLDEN_DATE_FORMAT = '%Y-%m-%d'
+GOLDEN_FLOAT_RTOL = 1e-9
+GOLDEN_OBJECTIVE_RTOL = 1e-6
+
+def _size_label(size):
+    return "{}x{}x{}".format(*size)
+
+def _csv_text(df):
+    """Serializes a result frame the way golden fixtures store it (ISO dates, no index)."""
+    if df.columns.empty:
+        return ''
+    return df.to_csv(index=False, date_format=GOLDEN_DATE_FORMAT, lineterminator='\n')
+
+def _read_csv_text(text):
+    return pd.read_csv(StringIO(text)) if text.strip() else pd.DataFrame()
+
+def save_golden(golden_dir, engine=None, sizes=DEFAULT_SIZES, seed=0, planning_date=DEFAULT_PLANNING_DATE,
+                include_scheduling=True):
+    """Writes one golden fixture directory per size from engine (the reference engine by default)."""
+    engine = engine or reference_engine()
+    for size in sizes:
+        out = run_pipeline(generate_workbook(*size, seed=seed, planning_date=planning_date), engine,
+                           planning_date, include_scheduling)
+        size_dir = os.path.join(golden_dir, _size_label(size))
+        os.makedirs(size_dir, exist_ok=True)
+        for name in ('procurement', 'comparison'):
+            with open(os.path.join(size_dir, f'{name}.csv'), 'w', newline='') as fh:
+                fh.write(_csv_text(out[f'{name}_df']))
+        summary = {
+            'size': list(size),
+            'seed': seed,
+            'planning_date': resolve_planning_date(planning_date).strftime(GOLDEN_DATE_FORMAT),
+            'float_rtol': GOLDEN_FLOAT_RTOL,
+            'objective_rtol': GOLDEN_OBJECTIVE_RTOL,
+            'objective_value': out['objective_value'],
+            'material_earliest_receipt': {
+                str(mat): pd.Timestamp(d).strftime(GOLDEN_DATE_FORMAT)
+                for mat, d in out['material_earliest_receipt'].items()
+            }
+        }
+        with open(os.path.join(size_dir, 'summary.json'), 'w', newline='\n') as fh:
+            json.dump(summary, fh, indent=2, sort_keys=True)
+            fh.write('\n')
+
+def _golden_sizes(golden_dir):
+    sizes = []
+    for name in sorted(os.listdir(golden_dir)):
+        if os.path.isfile(os.path.join(golden_dir, name, 'summary.json')):
+            sizes.append(tuple(int(n) for n in name.split('x')))
+    return sizes
+
+def check_golden(golden_dir, engine=None, sizes=None, include_scheduling=True):
+    """
+    Re-runs engine (the candidate engine by default) on the workbooks the fixtures were
+    generated from. Floats are compared with the fixture's float_rtol and the MILP objective
+    with its objective_rtol; dates and labels must match exactly.
+    Returns {size label: [differences]} for sizes that no longer match.
+    """
+    engine = engine or candidate_engine()
+    failures = {}
+    for size in (sizes or _golden_sizes(golden_dir)):
+        size_dir = os.path.join(golden_dir, _size_label(size))
+        with open(os.path.join(size_dir, 'summary.json')) as fh:
+            summary = json.load(fh)
+        sheets = generate_workbook(*size, seed=summary['seed'], planning_date=summary['planning_date'])
+        out = run_pipeline(sheets, engine, summary['planning_date'], include_scheduling)
+
+        problems = []
+        for name in ('procurement', 'comparison'):
+            with open(os.path.join(size_dir, f'{name}.csv'), newline='') as fh:
+                expected = _read_csv_text(fh.read())
+            actual = _read_csv_text(_csv_text(out[f'{name}_df']))
+            try:
+                pd.testing.assert_frame_equal(
+                    expected, actual, check_dtype=False, check_exact=False,
+                    rtol=summary['float_rtol'], atol=summary['float_rtol']
+                )
+            except AssertionError as exc:
+                problems.append(f"{name}.csv differs: {str(exc).splitlines()[0]}")
+        actual_receipts = {
+            str(mat): pd.Timestamp(d).strftime(GOLDEN_DATE_FORMAT)
+            for mat, d in out['material_earliest_receipt'].items()
+        }
+        if actual_receipts != summary['material_earliest_receipt']:
+            problems.append("material_earliest_receipt differs")
+        if include_scheduling:
+            exp_obj, act_obj = summary['objective_value'], out['objective_value']
+            if exp_obj is None or act_obj is None:
+                problems.append(f"objective_value missing: fixture {exp_obj}, run {act_obj}")
+            elif abs(exp_obj - act_obj) > summary['objective_rtol'] * max(1.0, abs(exp_obj)):
+                problems.append(f"objective_value differs: {exp_obj} vs {act_obj}")
+        if problems:
+            failures[_size_label(size)] = problems
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MRP/scheduling regression and performance-equivalence harness")
+    parser.add_argument('--golden-dir', help="directory of golden fixtures to check (or write with --update)")
+    parser.add_argument('--update', action='store_true', help="rewrite golden fixtures from the reference engine")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-scheduling', action='store_true', help="compare MRP only (skips the MILP)")
+    args = parser.parse_args(argv)
+
+    include_scheduling = not args.no_scheduling
+    if args.golden_dir and args.update:
+        save_golden(args.golden_dir, seed=args.seed, include_scheduling=include_scheduling)
+        print(f"Golden fixtures written to {args.golden_dir}")
+        return 0
+    if args.golden_dir:
+        failures = check_golden(args.golden_dir, include_scheduling=include_scheduling)
+        for size, problems in failures.items():
+            print(f"{size}: " + "; ".join(problems))
+        print("Golden check " + ("FAILED" if failures else "passed"))
+        return 1 if failures else 0
+
+    report = run_equivalence_harness(seed=args.seed, include_scheduling=include_scheduling)
+    print(report.to_string(index=False))
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,70 +1,85 @@
 # modules/scheduling_core.py
 import pandas as pd
+import numpy as np
 import math
 import pulp
 from collections import defaultdict
-from datetime import datetime
+from .data_model import build_plant_model, with_machines
+from .utils import resolve_planning_date
 
-def run_scheduling_with_mrp_integration(mrp_results, machines_df, eligibility_df):
-    products_df = mrp_results['products_df']
-    bom_df = mrp_results['bom_df']
-    materials_df = mrp_results['materials_df']
+def run_scheduling_with_mrp_integration(mrp_results, machines_df, eligibility_df, plant_model=None,
+                                        planning_date=None, solver=None):
+    """
+    machines_df / eligibility_df: Machines and Eligibility sheets; they replace the machines and
+    eligibility of the plant model when given (pass None to use the model's own).
+    plant_model: PlantModel from load_workbook; falls back to mrp_results['plant_model'],
+    then to building one from the DataFrames.
+    planning_date: date treated as "today"; falls back to mrp_results['planning_date'], then the current date.
+    solver: optional pulp solver (e.g. pulp.PULP_CBC_CMD(msg=False)); pulp's default otherwise.
+    Returns: dict with milp_prod_df, gantt_tasks_df, objective_value and solver_status
+    """
+    if plant_model is None:
+        plant_model = mrp_results.get('plant_model')
+    if plant_model is None:
+        plant_model = build_plant_model(
+            mrp_results['products_df'], mrp_results['bom_df'], mrp_results['materials_df'],
+            machines_df, eligibility_df
+        )
+    elif machines_df is not None:
+        plant_model = with_machines(plant_model, machines_df, eligibility_df)
+    prod_tbl = plant_model.products
+    mach_tbl = plant_model.machines
+    if planning_date is None:
+        planning_date = mrp_results.get('planning_date')
+    today = np.datetime64(resolve_planning_date(planning_date).date(), 'D')
 
     # product metadata
-    products = products_df['Product_ID'].tolist()
+    products = prod_tbl.ids.tolist()
+    due_days = np.maximum((prod_tbl.due_dates.astype('datetime64[D]') - today).astype(float), 0.0)
+    due_days = np.where(np.isnan(prod_tbl.days_from_today), due_days, prod_tbl.days_from_today)
     product_data = {}
-    for _, row in products_df.iterrows():
-        pid = row['Product_ID']
-        if 'Days from Today' in row and not pd.isna(row['Days from Today']):
-            due_days = float(row['Days from Today'])
-        else:
-            due_days = (pd.to_datetime(row['Due Date']).date() - datetime.today().date()).days
-            if due_days < 0: due_days = 0.0
+    for pid, demand, days, penalty in zip(products, prod_tbl.units, due_days, prod_tbl.penalty_per_day):
         product_data[pid] = {
-            'demand': float(row.get('Units to Delivered', 0)),
-            'due_date_hours': due_days * 24,
-            'penalty_per_hour': float(row.get('Penalty Per Day[Rs]', 0)) / 24.0 if 'Penalty Per Day[Rs]' in row else 0.0
+            'demand': float(demand),
+            'due_date_hours': float(days) * 24,
+            'penalty_per_hour': float(penalty) / 24.0
         }
 
     # machine metadata
-    machines = machines_df['Machine / Vessel ID'].tolist()
+    machines = mach_tbl.ids.tolist()
     machine_data = {}
-    for _, row in machines_df.iterrows():
-        mid = row['Machine / Vessel ID']
+    for mid, op_cost, cyc, cap, pre, post in zip(machines, mach_tbl.op_cost_per_hour, mach_tbl.cycle_time_hours,
+                                                 mach_tbl.capacity_units, mach_tbl.pre_maintenance_hours,
+                                                 mach_tbl.post_maintenance_hours):
         machine_data[mid] = {
-            'op_cost_per_hour': float(row.get('Running Cost Per Hour in Rs', 0)),
-            'cycle_time_hours': float(row.get('Cycle Time in Hours Per Batch', 0)) if not pd.isna(row.get('Cycle Time in Hours Per Batch', 0)) else 0.0,
-            'capacity_units': float(row.get('Volume[Capacity] in Units Per batch', 0)) if not pd.isna(row.get('Volume[Capacity] in Units Per batch', 0)) else 0.0,
-            'pre_maintenance_hours': float(row.get('PreMaintenanceHours', 0)) if 'PreMaintenanceHours' in row else 0.0,
-            'post_maintenance_hours': float(row.get('PostMaintenanceHours', 0)) if 'PostMaintenanceHours' in row else 0.0
+            'op_cost_per_hour': float(op_cost),
+            'cycle_time_hours': float(cyc),
+            'capacity_units': float(cap),
+            'pre_maintenance_hours': float(pre),
+            'post_maintenance_hours': float(post),
+            'total_maintenance_hours': float(pre) + float(post)
         }
-        machine_data[mid]['total_maintenance_hours'] = machine_data[mid]['pre_maintenance_hours'] + machine_data[mid]['post_maintenance_hours']
-
-    eligibility_df = eligibility_df.set_index('Product_ID') if not eligibility_df.empty else eligibility_df
-    eligibility = eligibility_df.to_dict('index') if not eligibility_df.empty else {}
 
     # Build material_ready & product_material_ready_hours
+    # Latest material receipt over each product's BOM; materials without a planned
+    # receipt are ready today if stocked, otherwise a year out.
     mat_ready = mrp_results['material_earliest_receipt']
-    product_material_ready_hours = {}
-    for _, prod in products_df.iterrows():
-        pid = prod['Product_ID']
-        prod_bom = bom_df[bom_df['Parent'] == pid]
-        latest_date = None
-        for _, comp in prod_bom.iterrows():
-            mat = comp['Item']
-            mat_date = mat_ready.get(mat)
-            if mat_date is None:
-                mat_row = materials_df.set_index('Raw materials').to_dict('index').get(mat, {})
-                if float(mat_row.get('OnHand', 0)) > 0:
-                    mat_date = pd.Timestamp(datetime.today().date())
-                else:
-                    mat_date = pd.Timestamp(datetime.today().date()) + pd.Timedelta(days=365)
-            if latest_date is None or mat_date > latest_date:
-                latest_date = mat_date
-        if latest_date is None:
-            latest_date = pd.Timestamp(datetime.today().date())
-        hours_from_today = max(0.0, (pd.to_datetime(latest_date).date() - datetime.today().date()).days * 24.0)
-        product_material_ready_hours[pid] = hours_from_today
+    on_hand_by_material = dict(zip(plant_model.materials.ids, plant_model.materials.on_hand))
+    bom = plant_model.bom
+    stocked_date = pd.Timestamp(today)
+    unstocked_date = stocked_date + pd.Timedelta(days=365)
+    ready_dates = np.array([
+        np.datetime64(mat_ready[mat], 'D') if mat in mat_ready
+        else np.datetime64(stocked_date if on_hand_by_material.get(mat, 0.0) > 0 else unstocked_date, 'D')
+        for mat in bom.items
+    ], dtype='datetime64[D]')
+    latest_ready = np.full(len(products), today, dtype='datetime64[D]')
+    known = bom.parent_idx >= 0
+    if known.any():
+        per_product = pd.Series(ready_dates[known]).groupby(bom.parent_idx[known]).max()
+        latest_ready[per_product.index.to_numpy()] = per_product.to_numpy().astype('datetime64[D]')
+    ready_hours = np.maximum(0.0, (latest_ready - today).astype(float) * 24.0)
+    product_material_ready_hours = dict(zip(products, ready_hours.tolist()))
 
     # Build MILP
     model = pulp.LpProblem("Integrated_MRP_Scheduling", pulp.LpMinimize)
@@ -96,6 +111,8 @@ def run_scheduling_with_mrp_integration(mrp_results, machines_df, eligibility_df
     penalty_cost = pulp.lpSum(product_data[i]['penalty_per_hour'] * L[i] for i in products)
     model += operating_cost + penalty_cost
 
+    eligibility = plant_model.eligibility
+
     for i in products:
         model += pulp.lpSum(x[i, m] for m in machines) >= product_data[i]['demand']
         model += L[i] >= CT[i] - product_data[i]['due_date_hours']
@@ -105,19 +122,15 @@ def run_scheduling_with_mrp_integration(mrp_results, machines_df, eligibility_df
             cap = machine_data[m]['capacity_units']
             model += x[i, m] <= cap * u[i, m]
             model += u[i, m] <= M_cycles[(i, m)] * z[i, m]
-            if i in eligibility and m in eligibility[i]:
-                try:
-                    allowed = bool(eligibility[i][m])
-                except Exception:
-                    allowed = eligibility[i].get(m, 1)
-                model += z[i, m] <= (1 if allowed else 0)
+            if not eligibility[plant_model.product_index[i], plant_model.machine_index[m]]:
+                model += z[i, m] <= 0
             total_machine_time = (
                 pulp.lpSum(machine_data[m]['cycle_time_hours'] * u[j, m] for j in products)
                 + pulp.lpSum(machine_data[m]['total_maintenance_hours'] * z[j, m] for j in products)
             )
             model += CT[i] >= total_machine_time - M_time[m] * (1 - z[i, m])
 
-    model.solve()
+    model.solve(solver)
 
     milp_prod_rows = []
     product_CT = {}
@@ -165,5 +178,7 @@ def run_scheduling_with_mrp_integration(mrp_results, machines_df, eligibility_df
 
     return {
         'milp_prod_df': milp_prod_df,
-        'gantt_tasks_df': gantt_tasks_df
+        'gantt_tasks_df': gantt_tasks_df,
+        'objective_value': pulp.value(model.objective),
+        'solver_status': pulp.LpStatus[model.status]
     }
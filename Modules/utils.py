@@ -1,7 +1,17 @@
 # modules/utils.py
 from io import BytesIO
+from datetime import datetime
 import pandas as pd
 
+def resolve_planning_date(planning_date=None):
+    """
+    Normalizes the planning date ("today" for MRP and scheduling) to a midnight Timestamp.
+    None means the real current date; pass a fixed date for reproducible runs.
+    """
+    if planning_date is None:
+        return pd.Timestamp(datetime.today().date())
+    return pd.Timestamp(planning_date).normalize()
+
 def write_results_to_excel(procurement_df=None, procurement_summary=None, machine_gantt=None, milp_prod=None):
     """
     Returns BytesIO with an excel workbook containing provided DataFrames.
@@ -2,7 +2,7 @@
 import streamlit as st
 import pandas as pd
 from io import BytesIO
-from Modules.preprocessing import load_workbook
+from Modules.preprocessing import format_issue, load_workbook
 from Modules.mrp_core import run_mrp_and_return_results
 from Modules.scheduling_core import run_scheduling_with_mrp_integration
 from Modules.charts import (
@@ -30,14 +30,25 @@ if uploaded is not None:
         bytes_data = uploaded.read()
         # 1) Preprocess / read workbook
         sheets = load_workbook(BytesIO(bytes_data))
+        for issue in sheets['validation_warnings']:
+            st.warning(format_issue(issue))
 
         # 2) Run MRP
-        mrp_results = run_mrp_and_return_results(sheets['products_df'], sheets['bom_df'], sheets['materials_df'])
+        mrp_results = run_mrp_and_return_results(
+            sheets['products_df'], sheets['bom_df'], sheets['materials_df'],
+            plant_model=sheets['plant_model']
+        )
 
         procurement_df = mrp_results['procurement_df']
         comparison_df = mrp_results['comparison_df']
 
         # 3) Show procurement outputs
+        cache_stats = mrp_results.get('lot_sizing_cache_stats', {})
+        if cache_stats:
+            st.caption(
+                f"Lot-sizing cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                f"({cache_stats['hit_rate']:.0%} hit rate)"
+            )
         if procurement_df.empty:
             st.warning("MRP produced no procurement orders.")
         else:
@@ -64,7 +75,8 @@ if uploaded is not None:
         sched_results = run_scheduling_with_mrp_integration(
             mrp_results,
             sheets['machines_df'],
-            sheets['eligibility_df']
+            sheets['eligibility_df'],
+            plant_model=sheets['plant_model']
         )
 
         gantt_tasks_df = sched_results['gantt_tasks_df']
@@ -77,9 +89,9 @@ if uploaded is not None:
         else:
             # st.markdown("### 📈 Scheduling Summary")
             # render_scheduling_kpis(gantt_tasks_df)
-            render_scheduling_gantt(gantt_tasks_df)
+            render_scheduling_gantt(gantt_tasks_df, mrp_results['planning_date'])
             st.markdown("**Notes:** duration for each product = production cycles × cycle time per batch + maintenance time (if any).")
-            render_scheduling_table(gantt_tasks_df)
+            render_scheduling_table(gantt_tasks_df, mrp_results['planning_date'])
 
         # 5) Download combined excel
         towrite = write_results_to_excel(
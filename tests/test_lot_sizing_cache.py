@@ -0,0 +1,60 @@
+import os
+import pickle
+from Modules import lot_sizing_cache as cache_module
+from Modules.lot_sizing_cache import LotSizingCache
+from Modules.mrp_core import run_mrp_and_return_results
+from Modules.regression import DEFAULT_PLANNING_DATE, generate_workbook
+
+def test_lru_evicts_least_recently_used_entry():
+    cache = LotSizingCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1          # 'b' is now least recently used
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats() == {'hits': 3, 'misses': 1, 'hit_rate': 0.75, 'size': 2, 'maxsize': 2}
+
+def test_save_and_load_round_trip(tmp_path):
+    path = str(tmp_path / 'lot_sizing.pkl')
+    cache = LotSizingCache(maxsize=3, path=path)
+    for key, value in [('a', {'x': 1}), ('b', {'x': 2}), ('c', {'x': 3})]:
+        cache.put(key, value)
+    cache.get('a')
+    cache.save()
+    assert os.listdir(tmp_path) == ['lot_sizing.pkl']
+
+    reloaded = LotSizingCache(maxsize=3, path=path)
+    assert len(reloaded) == 3
+    reloaded.put('d', {'x': 4})         # LRU order survives the round trip: 'b' goes first
+    assert reloaded.get('b') is None
+    assert reloaded.get('a') == {'x': 1}
+
+def test_cache_from_another_version_or_unreadable_file_is_ignored(tmp_path, monkeypatch):
+    path = str(tmp_path / 'lot_sizing.pkl')
+    cache = LotSizingCache(path=path)
+    cache.put('a', 1)
+    cache.save()
+    monkeypatch.setattr(cache_module, '_CACHE_VERSION', cache_module._CACHE_VERSION + 1)
+    assert len(LotSizingCache(path=path)) == 0
+
+    with open(path, 'wb') as fh:
+        fh.write(b'not a pickle')
+    assert len(LotSizingCache(path=path)) == 0
+    with open(path, 'wb') as fh:
+        pickle.dump(['unexpected', 'layout'], fh)
+    assert len(LotSizingCache(path=path)) == 0
+
+def test_mrp_run_saves_persistent_cache(tmp_path):
+    path = str(tmp_path / 'lot_sizing.pkl')
+    sheets = generate_workbook(5, 10, 2)
+    inputs = (sheets['products_df'], sheets['bom_df'], sheets['materials_df'])
+    first = run_mrp_and_return_results(*inputs, lot_sizing_cache=LotSizingCache(path=path),
+                                       planning_date=DEFAULT_PLANNING_DATE)
+    assert os.path.exists(path)
+    second = run_mrp_and_return_results(*inputs, lot_sizing_cache=LotSizingCache(path=path),
+                                        planning_date=DEFAULT_PLANNING_DATE)
+    assert second['lot_sizing_cache_stats']['misses'] == 0
+    assert second['lot_sizing_cache_stats']['hits'] == first['lot_sizing_cache_stats']['misses'] + \
+        first['lot_sizing_cache_stats']['hits']
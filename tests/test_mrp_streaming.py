@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+from Modules.mrp_core import PROCUREMENT_COLUMNS, iter_mrp_chunks, run_mrp_and_return_results, run_mrp_streaming
+from Modules.regression import DEFAULT_PLANNING_DATE, generate_workbook
+
+def _inputs(n_products=6, n_materials=12, seed=1):
+    sheets = generate_workbook(n_products, n_materials, 2, seed=seed)
+    return sheets['products_df'], sheets['bom_df'], sheets['materials_df']
+
+def _batch(inputs):
+    return run_mrp_and_return_results(*inputs, planning_date=DEFAULT_PLANNING_DATE)
+
+def _read_csv_sink(path):
+    dates = [col for col, dtype in PROCUREMENT_COLUMNS.items() if dtype.startswith('datetime')]
+    return pd.read_csv(path, parse_dates=dates, dtype={'RawMaterial_ID': str, 'LotSizingModel_Used': str})
+
+@pytest.mark.parametrize('chunk_size', [1, 5, 12, 100])
+def test_chunks_respect_chunk_size_and_concatenate_to_batch_result(chunk_size):
+    inputs = _inputs()
+    expected = _batch(inputs)
+    chunks = list(iter_mrp_chunks(*inputs, chunk_size=chunk_size, planning_date=DEFAULT_PLANNING_DATE))
+    n_materials = len(expected['comparison_df'])
+    assert [len(c['comparison_df']) for c in chunks] == \
+        [chunk_size] * (n_materials // chunk_size) + ([n_materials % chunk_size] if n_materials % chunk_size else [])
+    comparison = pd.concat([c['comparison_df'] for c in chunks], ignore_index=True)
+    procurement = pd.concat([c['procurement_df'] for c in chunks], ignore_index=True)
+    pd.testing.assert_frame_equal(comparison, expected['comparison_df'])
+    pd.testing.assert_frame_equal(procurement, expected['procurement_df'])
+
+def test_streaming_uses_no_cache_unless_one_is_passed():
+    results = run_mrp_streaming(*_inputs(), chunk_size=4, planning_date=DEFAULT_PLANNING_DATE)
+    assert results['lot_sizing_cache_stats'] is None
+
+def test_csv_sink_appends_chunks_under_a_single_header(tmp_path):
+    inputs = _inputs()
+    expected = _batch(inputs)['procurement_df']
+    sink = tmp_path / 'orders.csv'
+    sink.write_text('stale,contents\n1,2\n')
+    results = run_mrp_streaming(*inputs, sink=str(sink), chunk_size=3, planning_date=DEFAULT_PLANNING_DATE)
+    assert results['procurement_df'].empty
+    assert sink.read_text().count('Requirement_Date') == 1
+    written = _read_csv_sink(sink)
+    pd.testing.assert_frame_equal(written, expected[written.columns], check_dtype=False)
+
+def test_sink_is_rewritten_with_header_only_when_nothing_is_ordered(tmp_path):
+    products_df, bom_df, materials_df = _inputs()
+    products_df['OnHand'] = products_df['Units to Delivered']
+    sink = tmp_path / 'orders.csv'
+    sink.write_text('stale,contents\n1,2\n')
+    run_mrp_streaming(products_df, bom_df, materials_df, sink=str(sink), chunk_size=3,
+                      planning_date=DEFAULT_PLANNING_DATE)
+    assert sink.read_text().splitlines() == [','.join(PROCUREMENT_COLUMNS)]
+
+def test_parquet_sink_round_trips(tmp_path):
+    pytest.importorskip('pyarrow')
+    inputs = _inputs()
+    expected = _batch(inputs)['procurement_df']
+    sink = tmp_path / 'orders.parquet'
+    run_mrp_streaming(*inputs, sink=str(sink), chunk_size=3, planning_date=DEFAULT_PLANNING_DATE)
+    written = pd.read_parquet(sink)
+    pd.testing.assert_frame_equal(written, expected[written.columns], check_dtype=False)
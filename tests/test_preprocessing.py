@@ -0,0 +1,46 @@
+import pandas as pd
+import pytest
+from Modules.preprocessing import WorkbookValidationError, _check_column, load_workbook
+from Modules.regression import generate_workbook, workbook_bytes
+
+def _issues(sheets):
+    with pytest.raises(WorkbookValidationError) as excinfo:
+        load_workbook(workbook_bytes(sheets))
+    return [(i['sheet'], i['column'], i['rows'], i['message']) for i in excinfo.value.issues]
+
+def test_whitespace_only_ids_are_blank_for_string_columns():
+    issues = _check_column('x', 'c', pd.Series(['A', '  ', 'B'], dtype='string'), 'id', True)
+    assert [(i['rows'], i['message']) for i in issues] == [([3], 'missing value')]
+    issues = _check_column('x', 'c', pd.Series(['A', '  ', 'B'], dtype=object), 'id', True)
+    assert [(i['rows'], i['message']) for i in issues] == [([3], 'missing value')]
+
+def test_valid_workbook_loads_and_keeps_descriptive_eligibility_columns_as_warnings():
+    sheets = generate_workbook(4, 8, 2)
+    sheets['eligibility_df'].insert(1, 'Product Name', [f'Widget {i}' for i in range(4)])
+    loaded = load_workbook(workbook_bytes(sheets))
+    assert [(i['sheet'], i['column'], i['severity']) for i in loaded['validation_warnings']] == \
+        [('Eligibility', 'Product Name', 'warning')]
+    assert loaded['plant_model'].eligibility.shape == (4, 2)
+
+def test_bad_eligibility_flag_for_a_known_machine_is_an_error():
+    sheets = generate_workbook(4, 8, 2)
+    sheets['eligibility_df']['MC001'] = sheets['eligibility_df']['MC001'].astype(object)
+    sheets['eligibility_df'].loc[2, 'MC001'] = 'yes'
+    assert _issues(sheets) == [('Eligibility', 'MC001', [4], 'not a number')]
+
+def test_cross_sheet_references_are_reported_with_rows():
+    sheets = generate_workbook(4, 8, 2)
+    sheets['bom_df'].loc[1, 'Item'] = 'RM99999'
+    sheets['bom_df'].loc[5, 'Parent'] = 'P9999'
+    sheets['eligibility_df'].loc[0, 'Product_ID'] = 'P8888'
+    assert _issues(sheets) == [
+        ('Bill of materials', 'Item', [3], "not found in sheet 'raw material details ', column 'Raw materials'"),
+        ('Bill of materials', 'Parent', [7], "not found in sheet 'product details', column 'Product_ID'"),
+        ('Eligibility', 'Product_ID', [2], "not found in sheet 'product details', column 'Product_ID'"),
+    ]
+
+def test_unknown_parent_alone_is_only_a_warning():
+    sheets = generate_workbook(4, 8, 2)
+    sheets['bom_df'].loc[5, 'Parent'] = 'P9999'
+    loaded = load_workbook(workbook_bytes(sheets))
+    assert [(i['column'], i['rows']) for i in loaded['validation_warnings']] == [('Parent', [7])]
@@ -0,0 +1,35 @@
+import pulp
+from Modules.mrp_core import run_mrp_and_return_results
+from Modules.regression import DEFAULT_PLANNING_DATE, generate_workbook
+from Modules.scheduling_core import run_scheduling_with_mrp_integration
+
+def _mrp(sheets):
+    return run_mrp_and_return_results(
+        sheets['products_df'], sheets['bom_df'], sheets['materials_df'],
+        plant_model=sheets['plant_model'], planning_date=DEFAULT_PLANNING_DATE
+    )
+
+def test_passed_machine_sheets_override_the_plant_model():
+    sheets = generate_workbook(4, 8, 2)
+    mrp_results = _mrp(sheets)
+    solver = pulp.PULP_CBC_CMD(msg=False)
+
+    eligibility_df = sheets['eligibility_df'].copy()
+    eligibility_df['MC000'] = 0
+    eligibility_df['MC001'] = 1
+    restricted = run_scheduling_with_mrp_integration(mrp_results, sheets['machines_df'], eligibility_df,
+                                                     solver=solver)
+    assert set(restricted['milp_prod_df']['Machine_ID']) == {'MC001'}
+
+    machines_df = sheets['machines_df'].iloc[[1]].reset_index(drop=True)
+    single = run_scheduling_with_mrp_integration(mrp_results, machines_df, sheets['eligibility_df'], solver=solver)
+    assert set(single['milp_prod_df']['Machine_ID']) == {'MC001'}
+
+def test_none_keeps_the_plant_model_machines():
+    sheets = generate_workbook(4, 8, 2)
+    mrp_results = _mrp(sheets)
+    solver = pulp.PULP_CBC_CMD(msg=False)
+    from_model = run_scheduling_with_mrp_integration(mrp_results, None, None, solver=solver)
+    from_sheets = run_scheduling_with_mrp_integration(mrp_results, sheets['machines_df'], sheets['eligibility_df'],
+                                                      solver=solver)
+    assert from_model['objective_value'] == from_sheets['objective_value']